@@ -1,6 +1,12 @@
 import psycopg2
-from psycopg2 import OperationalError, ProgrammingError
+from psycopg2 import OperationalError, ProgrammingError, sql
+from psycopg2.extensions import TRANSACTION_STATUS_INERROR
+from psycopg2.extras import execute_batch, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 import csv  # Import the csv module to read the CSV file
+import io  # In-memory buffer for streaming batches through COPY
+import queue  # Hands parsed batches from the CSV reader to the insert thread
+import threading
 
 # --- Connection Parameters ---
 # Based on Psycopg2 Python File
@@ -13,10 +19,47 @@ DB_PARAMS = {
     'port': '5432'
 }
 
+# These are the corresponding columns in your PostgreSQL table
+DB_COLUMNS = [
+    'customer_id', 'first_name', 'last_name', 'company', 'city', 
+    'country', 'phone_1', 'phone_2', 'email', 'subscription_date', 'website'
+]
+
+# 4 MiB read buffer for the CSV file (Python's default is 8 KiB)
+READ_BUFFER_SIZE = 1 << 22
+
+# Batch auto-tuning: aim for ~8 MiB of row data per batch, sized from
+# the first matching rows, and keep the result within sane bounds
+BATCH_TARGET_BYTES = 8 << 20
+BATCH_SAMPLE_ROWS = 100
+MIN_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 50_000
+
+# The COPY loader only drops and rebuilds the customer_id UNIQUE index when
+# the staged matches are at least this fraction of the table (e.g. first load)
+INDEX_REBUILD_RATIO = 0.2
+
+# Upsert clause shared by every insert path
+SQL_ON_CONFLICT = """
+    ON CONFLICT (customer_id) DO UPDATE SET
+        first_name = EXCLUDED.first_name,
+        last_name = EXCLUDED.last_name,
+        company = EXCLUDED.company,
+        city = EXCLUDED.city,
+        country = EXCLUDED.country,
+        phone_1 = EXCLUDED.phone_1,
+        phone_2 = EXCLUDED.phone_2,
+        email = EXCLUDED.email,
+        subscription_date = EXCLUDED.subscription_date,
+        website = EXCLUDED.website
+"""
+
 # --- Database Setup Function ---
 def setup_database(conn):
     """
-    Creates the 'customers' table in the database if it doesn't exist.
+    Creates the 'customers' table and its query index if they don't exist.
+    Doesn't commit: the DDL stays in the open transaction and is committed
+    (or rolled back) together with the data load in __main__.
     """
     # Notice the SQL-friendly snake_case column names
     # 'ON CONFLICT (customer_id) DO NOTHING'
@@ -37,23 +80,182 @@ def setup_database(conn):
         website VARCHAR(255)
     );
     """
+
+    # Partial index matching get_filtered_customers' WHERE clause exactly,
+    # so the query becomes an index range scan already in ORDER BY order.
+    # INCLUDE covers the selected columns for an index-only scan (no heap).
+    create_index_sql = """
+    CREATE INDEX IF NOT EXISTS customers_af_cover_idx
+    ON customers (subscription_date DESC)
+    INCLUDE (first_name, last_name, company)
+    WHERE first_name LIKE 'A%' AND last_name LIKE 'F%';
+    """
     try:
         with conn.cursor() as cur:
             cur.execute(create_table_sql)
-        conn.commit()
-        print("Successfully ensured 'customers' table exists.")
+            cur.execute(create_index_sql)
+        print("Successfully ensured 'customers' table and index exist.")
     except Exception as e:
         conn.rollback()
         print(f"Error during table setup: {e}")
         raise # Re-raise the exception to stop the script if setup fails
 
+# --- Batch Flush Helper ---
+def flush_via_copy(cur, batch):
+    """
+    Streams a batch of row tuples into the 'customers' table with COPY.
+    COPY can't do ON CONFLICT, so the rows land in a temp staging table
+    first and are merged into 'customers' with one upsert per batch.
+    """
+    columns = ', '.join(DB_COLUMNS)
+
+    # Temp tables skip WAL, so the staging table is already unlogged.
+    # It lives until the single commit in __main__.
+    # 'ord' is the row's position in the batch
+    sql_stage = f"""
+    CREATE TEMP TABLE IF NOT EXISTS customers_stage ON COMMIT DROP AS
+    SELECT {columns}, 0 AS ord FROM customers WITH NO DATA;
+    """
+
+    # csv.writer writes '' and None alike, so FORCE_NOT_NULL keeps empty text
+    # as '' (same as the 'values'/'prepared' paths); only the date can be NULL
+    text_columns = ', '.join(col for col in DB_COLUMNS if col != 'subscription_date')
+    sql_copy = (
+        f"COPY customers_stage ({columns}, ord) FROM STDIN "
+        f"WITH (FORMAT CSV, NULL '', FORCE_NOT_NULL ({text_columns}))"
+    )
+
+    # One row per customer_id (the last one in the batch wins, like the old
+    # row-by-row upsert); ON CONFLICT can't touch the same row twice
+    sql_merge = f"""
+    INSERT INTO customers ({columns})
+    SELECT DISTINCT ON (customer_id) {columns} FROM customers_stage
+    ORDER BY customer_id, ord DESC
+    {SQL_ON_CONFLICT};
+    TRUNCATE customers_stage;
+    """
+
+    # Write the batch as CSV text into memory
+    buf = io.StringIO()
+    writer = csv.writer(buf, quoting=csv.QUOTE_MINIMAL)
+    writer.writerows(row + (pos,) for pos, row in enumerate(batch))
+    buf.seek(0)
+
+    cur.execute(sql_stage)
+    cur.copy_expert(sql=sql_copy, file=buf)
+    cur.execute(sql_merge)
+
+def flush_via_values(cur, batch):
+    """
+    Inserts a batch of row tuples with one multi-row INSERT ... VALUES
+    statement. Use this when COPY isn't available; the upsert stays inline.
+    """
+    sql_insert = f"""
+    INSERT INTO customers ({', '.join(DB_COLUMNS)})
+    VALUES %s
+    {SQL_ON_CONFLICT};
+    """
+
+    # ON CONFLICT can't touch the same row twice in one statement, so keep
+    # only the last row per customer_id (like the old row-by-row upsert)
+    rows = list({row[0]: row for row in batch}.values())
+
+    # page_size=len(rows) sends the whole batch as a single statement
+    execute_values(cur, sql_insert, rows, template=None, page_size=len(rows))
+
+def flush_via_prepared(cur, batch):
+    """
+    Inserts a batch of row tuples through the server-side prepared
+    statement 'ins_customer', so PostgreSQL parses and plans it only once.
+    process_and_insert_csv PREPAREs it before the first batch.
+    """
+    sql_execute = "EXECUTE ins_customer (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+
+    # One page per batch: every EXECUTE goes out back-to-back in a
+    # single message and round trip, like libpq pipeline mode
+    execute_batch(cur, sql_execute, batch, page_size=len(batch))
+
+# Insert paths selectable in process_and_insert_csv
+FLUSH_METHODS = {
+    'copy': flush_via_copy,
+    'values': flush_via_values,
+    'prepared': flush_via_prepared,
+}
+
+# --- Batch Size Auto-Tuning ---
+def auto_batch_size(sample):
+    """
+    Picks a batch size from the average width of the sampled row tuples
+    so that a batch carries roughly BATCH_TARGET_BYTES of data.
+    """
+    avg_bytes = sum(len(v) for row in sample for v in row if v) / len(sample)
+    size = int(BATCH_TARGET_BYTES / max(avg_bytes, 1))
+    return min(MAX_BATCH_SIZE, max(MIN_BATCH_SIZE, size))
+
+# --- Background Insert Worker ---
+def insert_worker(conn, flush, batches, errors):
+    """
+    Consumer thread: takes batches off the queue and flushes them until it
+    gets the None sentinel. After a failure it keeps draining the queue so
+    the CSV reader never blocks, and leaves the exception in 'errors'.
+    """
+    cur = None
+    try:
+        while True:
+            batch = batches.get()
+            try:
+                if batch is None:
+                    return
+                if not errors:
+                    # One cursor for the whole load instead of one per batch
+                    if cur is None:
+                        cur = conn.cursor()
+                    flush(cur, batch)
+                    print(f"  ... inserted batch of {len(batch)} rows.")
+            except Exception as e:
+                errors.append(e)
+            finally:
+                batches.task_done()
+    finally:
+        if cur is not None and not conn.closed:
+            cur.close()
+
+def queue_batch(batches, batch, worker):
+    """
+    Puts a batch (or the None sentinel) on the queue, waiting while it is
+    full, but gives up instead of hanging if the insert thread has died.
+    """
+    while True:
+        try:
+            batches.put(batch, timeout=1)
+            return
+        except queue.Full:
+            if not worker.is_alive():
+                raise RuntimeError("The insert thread stopped unexpectedly.")
+
 # --- CSV Processing and Batch Insertion Function ---
 
 
-def process_and_insert_csv(conn, csv_filename, batch_size=1000):
+def process_and_insert_csv(conn, csv_filename, batch_size=None, method='copy'):
     """
     Reads a CSV file line-by-line, filters rows, and inserts them
     into the 'customers' table in batches to handle large files.
+    Parsing runs here while a worker thread inserts the previous batches.
+    'method' picks the insert path: 'copy' (default), 'values' or 'prepared'.
+    With batch_size=None the size is tuned from the first matching rows.
+    If a 'prepared' load fails mid-transaction, this rolls back the caller's
+    transaction itself (setup_database's DDL included) so the prepared
+    statement can be dropped.
+    """
+    flush = FLUSH_METHODS[method]
+
+    # Only used by the 'prepared' method; $1..$11 follow DB_COLUMNS order
+    sql_prepare = f"""
+    PREPARE ins_customer (varchar, varchar, varchar, varchar, varchar, varchar,
+                          varchar, varchar, varchar, date, varchar) AS
+    INSERT INTO customers ({', '.join(DB_COLUMNS)})
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
+    {SQL_ON_CONFLICT};
     """
     
     # Match CSV file exactly
@@ -62,84 +264,276 @@ def process_and_insert_csv(conn, csv_filename, batch_size=1000):
         'Country', 'Phone 1', 'Phone 2', 'Email', 'Subscription Date', 'Website'
     ]
     
-    # These are the corresponding columns in your PostgreSQL table
-    DB_COLUMNS = [
-        'customer_id', 'first_name', 'last_name', 'company', 'city', 
-        'country', 'phone_1', 'phone_2', 'email', 'subscription_date', 'website'
-    ]
-    
-    # Exclude 'Index' from the DB insert
-    # This SQL query is built to match the DB_COLUMNS order
-    sql_insert = f"""
-    INSERT INTO customers ({', '.join(DB_COLUMNS)})
-    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-    ON CONFLICT (customer_id) DO UPDATE SET
-        first_name = EXCLUDED.first_name,
-        last_name = EXCLUDED.last_name,
-        company = EXCLUDED.company,
-        city = EXCLUDED.city,
-        country = EXCLUDED.country,
-        phone_1 = EXCLUDED.phone_1,
-        phone_2 = EXCLUDED.phone_2,
-        email = EXCLUDED.email,
-        subscription_date = EXCLUDED.subscription_date,
-        website = EXCLUDED.website;
-    """
-    
+    # Until tuned, the first "batch" is only the sample for auto_batch_size
+    tuning = batch_size is None
+    if tuning:
+        batch_size = BATCH_SAMPLE_ROWS
+
     batch = []
     total_processed = 0
     total_inserted = 0
 
+    # Bounded so parsing can't run more than a few batches ahead of the DB.
+    # The worker shares 'conn' (psycopg2 connections are thread-safe) so
+    # every batch stays in the one transaction committed by __main__.
+    batches = queue.Queue(maxsize=4)
+    errors = []
+    worker = threading.Thread(target=insert_worker, args=(conn, flush, batches, errors), daemon=True)
+    prepared = False
+
     print(f"Starting to process '{csv_filename}'...")
 
     try:
-        with open(csv_filename, mode='r', encoding='utf-8') as f:
-            # Using csv.DictReader to easily access columns by name
-            reader = csv.DictReader(f)
+        # Don't wait for the WAL fsync at commit; lasts for this transaction only
+        with conn.cursor() as cur:
+            cur.execute("SET LOCAL synchronous_commit = off")
+            if method == 'prepared':
+                cur.execute(sql_prepare)
+                prepared = True
+
+        worker.start()
+        with open(csv_filename, mode='r', encoding='utf-8', newline='', buffering=READ_BUFFER_SIZE) as f:
+            # Plain csv.reader yields lists; read the header once and
+            # index each row by position instead of building a dict per row
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                print(f"'{csv_filename}' is empty. Nothing to insert.")
+                return
+
+            I_CID = header.index('Customer Id')
+            I_FIRST = header.index('First Name')
+            I_LAST = header.index('Last Name')
+            I_COMPANY = header.index('Company')
+            I_CITY = header.index('City')
+            I_COUNTRY = header.index('Country')
+            I_PHONE1 = header.index('Phone 1')
+            I_PHONE2 = header.index('Phone 2')
+            I_EMAIL = header.index('Email')
+            I_SUBDATE = header.index('Subscription Date')
+            I_WEBSITE = header.index('Website')
             
             for row in reader:
+                # csv.reader yields [] for blank lines (DictReader skipped them)
+                if not row:
+                    continue
                 total_processed += 1
                 
                 # --- Filtering Logic ---
-                first_name = row.get('First Name', '')
-                last_name = row.get('Last Name', '')
+                first_name = row[I_FIRST]
+                last_name = row[I_LAST]
                 
-                if first_name.startswith('A') and last_name.startswith('F'):
-                    # 'None' or empty strings for dates
-                    sub_date = row.get('Subscription date')
-                    if not sub_date: # If sub_date is "" or None
-                        sub_date = None 
+                # [:1] is a plain slice compare and is safe on empty names.
+                # Surnames starting with 'F' are the rarer match, so test them first.
+                if last_name[:1] == 'F' and first_name[:1] == 'A':
+                    # 'None' for empty dates
+                    sub_date = row[I_SUBDATE] or None
                 
                     # Build the tuple of data IN THE ORDER of DB_COLUMNS
                     data_tuple = (
-                        row.get('Customer Id'),
+                        row[I_CID],
                         first_name,
                         last_name,
-                        row.get('Company'),
-                        row.get('City'),
-                        row.get('Country'),
-                        row.get('Phone 1'),
-                        row.get('Phone 2'),
-                        row.get('Email'),
+                        row[I_COMPANY],
+                        row[I_CITY],
+                        row[I_COUNTRY],
+                        row[I_PHONE1],
+                        row[I_PHONE2],
+                        row[I_EMAIL],
                         sub_date,
-                        row.get('Website')
+                        row[I_WEBSITE]
                     )
                     batch.append(data_tuple)
                     total_inserted += 1
 
-                # When the batch is full, execute it
+                # When the batch is full, hand it to the insert thread
                 if len(batch) >= batch_size:
-                    with conn.cursor() as cur:
-                        cur.executemany(sql_insert, batch)
-                    print(f"  ... inserted batch of {len(batch)} rows. (Total processed: {total_processed})")
-                    batch = [] # Reset the batch
+                    if tuning:
+                        batch_size = auto_batch_size(batch)
+                        tuning = False
+                        print(f"  ... using a batch size of {batch_size} rows.")
+                        continue
+
+                    queue_batch(batches, batch, worker)
+                    print(f"  ... queued batch of {len(batch)} rows. (Total processed: {total_processed})")
+                    batch = [] # Start a new batch; the queued one is still in use
+                    if errors:
+                        break
 
         # Insert any remaining rows (the last batch)
-        if batch:
-            with conn.cursor() as cur:
-                cur.executemany(sql_insert, batch)
-            print(f"  ... inserted final batch of {len(batch)} rows.")
-        
+        if batch and not errors:
+            queue_batch(batches, batch, worker)
+            print(f"  ... queued final batch of {len(batch)} rows.")
+
+        # Wait until every queued batch is in the database: the worker
+        # exits on the sentinel after the last one (or right away if it died)
+        queue_batch(batches, None, worker)
+        worker.join()
+        if errors:
+            raise errors[0]
+        if not batches.empty(): # Worker died before reaching the sentinel
+            raise RuntimeError("The insert thread stopped unexpectedly.")
+
+        print(f"\n--- Processing Complete ---")
+        print(f"Total rows processed from CSV: {total_processed}")
+        print(f"Total rows inserted/updated in DB: {total_inserted}")
+
+    except FileNotFoundError:
+        print(f"Error: Input file '{csv_filename}' not found.")
+    except Exception as e:
+        print(f"An error occurred while processing the file: {e}")
+        raise # Re-raise error to trigger a rollback
+    finally:
+        if worker.is_alive():
+            queue_batch(batches, None, worker) # Sentinel: stop the insert thread
+            worker.join()
+        if prepared and not conn.closed:
+            # PREPARE is per session and survives ROLLBACK, so always drop it;
+            # otherwise a pooled connection can't PREPARE ins_customer again.
+            # An aborted transaction is rolled back first (__main__ would anyway).
+            # Never let this hide an error that is already being raised.
+            try:
+                if conn.get_transaction_status() == TRANSACTION_STATUS_INERROR:
+                    conn.rollback()
+                with conn.cursor() as cur:
+                    cur.execute("DEALLOCATE ins_customer")
+            except psycopg2.Error as e:
+                print(f"Could not deallocate the prepared insert: {e}")
+
+# --- Server-Side Load and Filter Function ---
+def copy_and_insert_csv(conn, csv_filename):
+    """
+    Streams the whole CSV file into a temp staging table with COPY and
+    lets PostgreSQL do the A%/F% filtering and the upsert. For loads that
+    are large next to the table, the customer_id UNIQUE constraint is
+    dropped during the merge and rebuilt afterwards.
+    The file must have the same 12 columns, in order, as the sample CSV.
+    """
+    columns = ', '.join(DB_COLUMNS)
+
+    # Same layout as the CSV file, 'Index' included (temp = no WAL)
+    sql_stage = """
+    CREATE TEMP TABLE customers_csv_stage (
+        csv_index INTEGER,
+        customer_id VARCHAR(100),
+        first_name VARCHAR(255),
+        last_name VARCHAR(255),
+        company VARCHAR(255),
+        city VARCHAR(255),
+        country VARCHAR(255),
+        phone_1 VARCHAR(100),
+        phone_2 VARCHAR(100),
+        email VARCHAR(255),
+        subscription_date DATE,
+        website VARCHAR(255)
+    ) ON COMMIT DROP;
+    """
+
+    # Empty text fields load as '' like the Python loader; only an empty
+    # subscription date (or index) becomes NULL
+    text_columns = ', '.join(col for col in DB_COLUMNS if col != 'subscription_date')
+    sql_copy = (
+        "COPY customers_csv_stage FROM STDIN "
+        f"WITH (FORMAT CSV, HEADER TRUE, ENCODING 'UTF8', FORCE_NOT_NULL ({text_columns}))"
+    )
+
+    # Matching rows, one per customer_id (the last one in the file wins)
+    sql_matches = f"""
+    SELECT DISTINCT ON (customer_id) {columns}
+    FROM customers_csv_stage
+    WHERE first_name LIKE 'A%' AND last_name LIKE 'F%'
+    ORDER BY customer_id, csv_index DESC
+    """
+
+    # Usual case: few matches, keep the index and upsert through it
+    sql_upsert = f"""
+    INSERT INTO customers ({columns})
+    SELECT {columns} FROM ({sql_matches}) m
+    {SQL_ON_CONFLICT};
+    """
+
+    # Matches vs. table size: (staged matches, table is empty, estimated rows)
+    sql_sizes = """
+    SELECT
+        (SELECT count(*) FROM customers_csv_stage
+         WHERE first_name LIKE 'A%' AND last_name LIKE 'F%'),
+        NOT EXISTS (SELECT 1 FROM customers),
+        (SELECT reltuples FROM pg_class WHERE oid = 'customers'::regclass);
+    """
+
+    # Real names of the UNIQUE constraint(s) on customer_id alone
+    sql_unique_names = """
+    SELECT con.conname
+    FROM pg_constraint con
+    JOIN pg_attribute att
+      ON att.attrelid = con.conrelid AND att.attname = 'customer_id'
+    WHERE con.conrelid = 'customers'::regclass
+      AND con.contype = 'u'
+      AND con.conkey = ARRAY[att.attnum];
+    """
+
+    # Rebuild case: ON CONFLICT needs the unique index, which is dropped
+    # during the merge, so the upsert is split into an UPDATE and an
+    # anti-join INSERT
+    sql_update = f"""
+    UPDATE customers c SET
+        first_name = m.first_name,
+        last_name = m.last_name,
+        company = m.company,
+        city = m.city,
+        country = m.country,
+        phone_1 = m.phone_1,
+        phone_2 = m.phone_2,
+        email = m.email,
+        subscription_date = m.subscription_date,
+        website = m.website
+    FROM ({sql_matches}) m
+    WHERE c.customer_id = m.customer_id;
+    """
+
+    sql_insert = f"""
+    INSERT INTO customers ({columns})
+    SELECT {columns} FROM ({sql_matches}) m
+    WHERE NOT EXISTS (
+        SELECT 1 FROM customers c WHERE c.customer_id = m.customer_id
+    );
+    """
+
+    print(f"Starting to COPY '{csv_filename}'...")
+
+    try:
+        # Binary mode: the raw bytes go straight to the server, which does
+        # the UTF-8 decoding itself instead of Python decoding and re-encoding
+        with open(csv_filename, mode='rb', buffering=READ_BUFFER_SIZE) as f, conn.cursor() as cur:
+            # Don't wait for the WAL fsync at commit; lasts for this transaction only
+            cur.execute("SET LOCAL synchronous_commit = off")
+            cur.execute(sql_stage)
+            cur.copy_expert(sql_copy, f, size=READ_BUFFER_SIZE)
+            total_processed = cur.rowcount
+
+            # reltuples is -1 (unknown) until the table is first analyzed;
+            # then only an empty table counts as large enough to rebuild
+            cur.execute(sql_sizes)
+            matches, table_empty, table_rows = cur.fetchone()
+            rebuild = table_empty or (table_rows > 0 and matches >= table_rows * INDEX_REBUILD_RATIO)
+
+            if not rebuild:
+                cur.execute(sql_upsert)
+                total_inserted = cur.rowcount
+            else:
+                # Load then index: drop the UNIQUE index for the merge and
+                # rebuild it in one sorted pass afterwards. Dropping every
+                # match also cleans up any duplicate unique indexes.
+                cur.execute(sql_unique_names)
+                names = [row[0] for row in cur.fetchall()] or ['customers_customer_id_key']
+                for name in names:
+                    cur.execute(sql.SQL("ALTER TABLE customers DROP CONSTRAINT IF EXISTS {}").format(sql.Identifier(name)))
+                cur.execute(sql_update)
+                total_inserted = cur.rowcount
+                cur.execute(sql_insert)
+                total_inserted += cur.rowcount
+                cur.execute(sql.SQL("ALTER TABLE customers ADD CONSTRAINT {} UNIQUE (customer_id)").format(sql.Identifier(names[0])))
+
         print(f"\n--- Processing Complete ---")
         print(f"Total rows processed from CSV: {total_processed}")
         print(f"Total rows inserted/updated in DB: {total_inserted}")
@@ -150,6 +544,23 @@ def process_and_insert_csv(conn, csv_filename, batch_size=1000):
         print(f"An error occurred while processing the file: {e}")
         raise # Re-raise error to trigger a rollback
 
+# --- Post-Load Maintenance Function ---
+def vacuum_customers(conn):
+    """
+    Runs VACUUM ANALYZE on 'customers' so the visibility map is current
+    (index-only scans can skip the heap) and the planner has fresh stats.
+    VACUUM can't run inside a transaction, so call this after the commit.
+    """
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("VACUUM ANALYZE customers")
+        print("Vacuumed and analyzed 'customers'.")
+    except Exception as e:
+        print(f"An error occurred while vacuuming the table: {e}")
+    finally:
+        conn.autocommit = False
+
 # --- Database Query Function ---
 def get_filtered_customers(conn):
     """
@@ -185,22 +596,34 @@ if __name__ == "__main__":
     
     # === IMPORTANT: remember CSV file's name ===
     CSV_FILE_TO_PROCESS = "customers.csv" 
+
+    # True: COPY the whole file and filter inside PostgreSQL.
+    # False: filter in Python and insert in batches (any CSV column order).
+    FILTER_IN_DATABASE = True
     
+    pool = None
     conn = None
     try:
         # --- Part 1: Connect and Setup Table ---
-        conn = psycopg2.connect(**DB_PARAMS)
+        # Borrow from a pool so repeated loads skip the TCP + auth handshake
+        pool = ThreadedConnectionPool(minconn=1, maxconn=4, **DB_PARAMS)
+        conn = pool.getconn()
         print("Database connection established.")
         setup_database(conn) # Create the table 
 
         # --- Part 2: Process CSV and Insert Data ---
-        # This function does all the batch inserts
-        process_and_insert_csv(conn, CSV_FILE_TO_PROCESS, batch_size=1000)
+        if FILTER_IN_DATABASE:
+            copy_and_insert_csv(conn, CSV_FILE_TO_PROCESS)
+        else:
+            # This function does all the batch inserts
+            process_and_insert_csv(conn, CSV_FILE_TO_PROCESS)
         
         # --- Part 3: Commit all changes ---
         # ONCE after all batches are successfully processed.
+        # This also commits the table/index setup from Part 1.
         conn.commit()
         print("\nAll database changes have been committed.")
+        vacuum_customers(conn) # Needs the committed data, outside the transaction
 
         # --- Part 4: Query and Show Results ---
         # sorting idea
@@ -215,6 +638,8 @@ if __name__ == "__main__":
         if conn:
             conn.rollback() # Rollback all changes from the transaction
     finally:
-        if conn:
-            conn.close()
+        if pool:
+            if conn:
+                pool.putconn(conn)
+            pool.closeall()
             print("\nDatabase connection closed.")
\ No newline at end of file